@@ -3,19 +3,26 @@ API service for SHL Assessment Recommender
 This provides a REST API endpoint to query the recommendation model.
 """
 
-from fastapi import FastAPI, HTTPException, Query
+import time
+
+# Taken before the heavy imports so time-to-ready covers the whole startup
+_process_start = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import pandas as pd
-import numpy as np
 import os
 import re
-import requests
-from bs4 import BeautifulSoup
+import threading
 from typing import List, Optional, Dict, Any
 import uvicorn
 
+from catalog_shards import ShardedIndex, ShardLoadError, UnknownShardError, load_shard_specs
+import profiling
+import rpc
+import typeahead
+
 app = FastAPI(
     title="SHL Assessment Recommender API",
     description="API for recommending SHL assessments based on job descriptions or queries",
@@ -24,6 +31,10 @@ app = FastAPI(
 
 # Load model
 def load_model():
+    # Imported here so that torch and sentence_transformers are only pulled in
+    # by the background loader, after the server is already accepting requests
+    from sentence_transformers import SentenceTransformer
+
     try:
         # Path to the local model
         model_path = os.path.join('models', 'all-MiniLM-L6-v2')
@@ -40,23 +51,96 @@ def load_model():
         print(f"Error loading model: {str(e)}")
         raise e
 
-# Load data
-def load_data():
-    catalog, embeddings = pd.read_pickle("shl_catalog_with_embeddings.pkl")
-    embeddings = np.vstack(embeddings)
-    return catalog, embeddings
+# Model and catalog shards are loaded in the background after the server has
+# bound. Until then the model is None and /ready reports the loading stage.
+model = None
+index = None
+
+_ready = threading.Event()
+_startup = {
+    "stage": "starting",
+    "error": None,
+    "stage_timings": {},
+    "time_to_ready": None,
+}
+
+def _set_stage(stage: str):
+    _startup["stage"] = stage
+    print(f"Startup: {stage}")
 
-# Initialize model and data at startup
-model = load_model()
-catalog, embeddings = load_data()
-print("Model and data loaded successfully!")
+def _load_resources():
+    global model, index
+
+    try:
+        stage_start = time.perf_counter()
+        _set_stage("loading_model")
+        loaded_model = load_model()
+        _startup["stage_timings"]["loading_model"] = round(time.perf_counter() - stage_start, 3)
+
+        stage_start = time.perf_counter()
+        _set_stage("loading_data")
+        loaded_index = ShardedIndex(load_shard_specs(), specs_loader=load_shard_specs)
+        loaded_index.load_all()
+        _startup["stage_timings"]["loading_data"] = round(time.perf_counter() - stage_start, 3)
+
+        # The first encode is much slower than the rest (lazy weight init,
+        # tokenizer caches), so pay for it here rather than on a user request
+        stage_start = time.perf_counter()
+        _set_stage("warming_up")
+        loaded_model.encode(["warm-up query"])
+        _startup["stage_timings"]["warming_up"] = round(time.perf_counter() - stage_start, 3)
+
+        model, index = loaded_model, loaded_index
+        _startup["time_to_ready"] = round(time.perf_counter() - _process_start, 3)
+        _set_stage("ready")
+        _ready.set()
+        print(f"Model and data loaded successfully! Time to ready: {_startup['time_to_ready']}s")
+    except Exception as e:
+        _startup["error"] = str(e)
+        _set_stage("failed")
+        print(f"Error loading resources: {str(e)}")
+
+@app.on_event("startup")
+def start_background_loading():
+    threading.Thread(target=_load_resources, name="resource-loader", daemon=True).start()
+
+# Binary RPC interface for internal callers. It is unauthenticated, so it
+# only starts when SHL_RPC_PORT is set and binds to localhost by default.
+RPC_HOST = os.environ.get("SHL_RPC_HOST", "127.0.0.1")
+RPC_PORT = int(os.environ.get("SHL_RPC_PORT", "0"))
+
+def _rpc_engine():
+    return (model, index) if _ready.is_set() else None
+
+@app.on_event("startup")
+async def start_rpc_server():
+    if not RPC_PORT:
+        return
+    try:
+        app.state.rpc_server = await rpc.serve(_rpc_engine, host=RPC_HOST, port=RPC_PORT)
+    except OSError as e:
+        print(f"Could not start RPC server on port {RPC_PORT}: {str(e)}")
+
+@app.on_event("shutdown")
+async def stop_rpc_server():
+    rpc_server = getattr(app.state, "rpc_server", None)
+    if rpc_server is not None:
+        rpc_server.close()
+        await rpc_server.wait_closed()
+
+def require_ready():
+    if not _ready.is_set():
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service is not ready yet (stage: {_startup['stage']})",
+        )
 
 def extract_text_from_url(url: str) -> str:
+    # Only URL inputs need the HTTP client and HTML parser
+    import text_extraction
+
     try:
-        res = requests.get(url, timeout=5)
-        soup = BeautifulSoup(res.content, 'html.parser')
-        paragraphs = soup.find_all("p")
-        return " ".join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+        return text_extraction.extract_text_from_url(url)
     except Exception as e:
         print(f"Error processing URL: {str(e)}")
         return ""
@@ -66,19 +150,34 @@ def process_input(input_text: str) -> str:
         return extract_text_from_url(input_text)
     return input_text
 
-def recommend(query_text: str, top_n=5):
-    clean_text = process_input(query_text)
+def recommend(query_text: str, top_n=5, shards: Optional[List[str]] = None, profile=None):
+    with profiling.stage(profile, "process_input"):
+        clean_text = process_input(query_text)
     
+    if profile is not None:
+        profile.info["query_chars"] = len(query_text)
+        profile.info["text_chars"] = len(clean_text)
+        if clean_text:
+            profile.info["tokens"] = len(model.tokenizer(clean_text)["input_ids"])
+            profile.info["max_seq_length"] = model.max_seq_length
+
     if not clean_text:
         return None
         
-    query_embedding = model.encode([clean_text])
-    scores = cosine_similarity(query_embedding, embeddings)[0]
+    with profiling.stage(profile, "encode"):
+        query_embedding = encode_query(clean_text)
+
+    try:
+        with profiling.stage(profile, "ranking"):
+            return rank(query_embedding, top_n=top_n, shards=shards)
+    except UnknownShardError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    catalog["similarity"] = scores
-    deduped = catalog.sort_values("similarity", ascending=False).drop_duplicates(subset=["Test Name"])
+def encode_query(text: str):
+    return model.encode([text], normalize_embeddings=True)[0]
 
-    top_results = deduped.head(top_n).copy()
+def rank(query_embedding, top_n=5, shards: Optional[List[str]] = None):
+    top_results = index.search(query_embedding, top_n=top_n, shards=shards)
     top_results["similarity"] = top_results["similarity"].round(3)
     
     # Convert similarity to percentage
@@ -86,13 +185,14 @@ def recommend(query_text: str, top_n=5):
 
     return top_results[[
         "Test Name", "Link", "Remote Testing", "Adaptive/IRT", 
-        "duration", "Test Types", "similarity", "match_percentage"
+        "duration", "Test Types", "similarity", "match_percentage", "shard"
     ]]
 
 # Request models
 class QueryRequest(BaseModel):
     query: str
     top_n: Optional[int] = 5
+    shards: Optional[List[str]] = None
 
 class Assessment(BaseModel):
     test_name: str
@@ -103,29 +203,25 @@ class Assessment(BaseModel):
     test_types: str
     similarity: float
     match_percentage: int
+    shard: Optional[str] = None
 
 class RecommendationResponse(BaseModel):
     recommendations: List[Assessment]
     query: str
+    profile: Optional[Dict[str, Any]] = None
 
-@app.get("/")
-def read_root():
-    return {"message": "Welcome to SHL Assessment Recommender API! Use /recommend endpoint to get recommendations."}
-
-@app.get("/health")
-def health_check():
-    return {"status": "healthy", "model_loaded": model is not None}
-
-@app.post("/recommend", response_model=RecommendationResponse)
-def get_recommendations(request: QueryRequest):
-    if not request.query or len(request.query.strip()) == 0:
-        raise HTTPException(status_code=400, detail="Query cannot be empty")
-    
-    results = recommend(request.query, top_n=request.top_n)
+def _build_response(query: str, top_n: int, shards: Optional[List[str]], profile=None):
+    results = recommend(query, top_n=top_n, shards=shards, profile=profile)
     
     if results is None or results.empty:
-        return RecommendationResponse(recommendations=[], query=request.query)
+        return RecommendationResponse(recommendations=[], query=query)
     
+    with profiling.stage(profile, "serialization"):
+        assessments = to_assessments(results)
+    
+    return RecommendationResponse(recommendations=assessments, query=query)
+
+def to_assessments(results) -> List[Assessment]:
     # Convert DataFrame to list of Assessment objects
     assessments = []
     for _, row in results.iterrows():
@@ -137,41 +233,117 @@ def get_recommendations(request: QueryRequest):
             duration=row["duration"],
             test_types=row["Test Types"],
             similarity=float(row["similarity"]),
-            match_percentage=int(row["match_percentage"])
+            match_percentage=int(row["match_percentage"]),
+            shard=row["shard"]
         )
         assessments.append(assessment)
-    
-    return RecommendationResponse(recommendations=assessments, query=request.query)
+    return assessments
+
+def handle_recommend(query: str, top_n: int, shards: Optional[List[str]], http_request: Request, response: Response):
+    require_ready()
+    if not query or len(query.strip()) == 0:
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-@app.get("/recommend", response_model=RecommendationResponse)
+    profile = profiling.maybe_profile(http_request.headers)
+    if profile is None:
+        return _build_response(query, top_n, shards)
+
+    with profile:
+        result = _build_response(query, top_n, shards, profile)
+
+    if profile.total is None:
+        return result
+    if profile.inline:
+        result.profile = profile.summary()
+    else:
+        profile_id = profile.save()
+        if profile_id is not None:
+            response.headers[profiling.PROFILE_ID_HEADER] = profile_id
+    return result
+
+@app.get("/")
+def read_root():
+    return {"message": "Welcome to SHL Assessment Recommender API! Use /recommend endpoint to get recommendations."}
+
+@app.get("/health")
+def health_check():
+    # Liveness only: answers as soon as the server is up, even while loading
+    return {"status": "healthy", "model_loaded": _ready.is_set()}
+
+@app.get("/ready")
+def readiness_check():
+    body = {
+        "ready": _ready.is_set(),
+        "stage": _startup["stage"],
+        "error": _startup["error"],
+        "stage_timings": _startup["stage_timings"],
+        "time_to_ready": _startup["time_to_ready"],
+        "uptime": round(time.perf_counter() - _process_start, 3),
+    }
+    return JSONResponse(content=body, status_code=200 if _ready.is_set() else 503)
+
+@app.get("/shards")
+def list_shards():
+    require_ready()
+    return {"shards": index.describe()}
+
+@app.post("/shards/{name}/reload")
+def reload_shard(name: str):
+    require_ready()
+    try:
+        shard = index.reload(name)
+    except UnknownShardError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ShardLoadError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return shard.describe()
+
+@app.post("/recommend", response_model=RecommendationResponse, response_model_exclude_none=True)
+def get_recommendations(request: QueryRequest, http_request: Request, response: Response):
+    return handle_recommend(request.query, request.top_n, request.shards, http_request, response)
+
+@app.get("/recommend", response_model=RecommendationResponse, response_model_exclude_none=True)
 def get_recommendations_get(
+    http_request: Request,
+    response: Response,
     query: str = Query(..., description="Job query or description"),
-    top_n: int = Query(5, description="Number of recommendations to return")
+    top_n: int = Query(5, description="Number of recommendations to return"),
+    shards: Optional[str] = Query(None, description="Comma-separated catalog shards to search (default: all)")
 ):
-    if not query or len(query.strip()) == 0:
-        raise HTTPException(status_code=400, detail="Query cannot be empty")
-    
-    results = recommend(query, top_n=top_n)
-    
-    if results is None or results.empty:
-        return RecommendationResponse(recommendations=[], query=query)
-    
-    # Convert DataFrame to list of Assessment objects
-    assessments = []
-    for _, row in results.iterrows():
-        assessment = Assessment(
-            test_name=row["Test Name"],
-            link=row["Link"],
-            remote_testing=row["Remote Testing"],
-            adaptive_irt=row["Adaptive/IRT"],
-            duration=row["duration"],
-            test_types=row["Test Types"],
-            similarity=float(row["similarity"]),
-            match_percentage=int(row["match_percentage"])
-        )
-        assessments.append(assessment)
-    
-    return RecommendationResponse(recommendations=assessments, query=query)
+    shard_names = [name.strip() for name in shards.split(",") if name.strip()] if shards else None
+    return handle_recommend(query, top_n, shard_names, http_request, response)
+
+def _rank_for_typeahead(query_embedding, top_n, shards):
+    return jsonable_encoder(to_assessments(rank(query_embedding, top_n=top_n, shards=shards)))
+
+@app.websocket("/ws/typeahead")
+async def typeahead_socket(websocket: WebSocket):
+    await websocket.accept()
+    if not _ready.is_set():
+        await websocket.send_json({"error": f"Service is not ready yet (stage: {_startup['stage']})"})
+        await websocket.close(code=1013)
+        return
+
+    session = typeahead.TypeaheadSession(encode=encode_query, rank=_rank_for_typeahead, send=websocket.send_json)
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                break
+            message = frame.get("text")
+            if message is None:
+                await websocket.send_json({"error": "Only text frames are supported"})
+                continue
+            try:
+                text, top_n, shards = typeahead.parse_update(message)
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            session.update(text, top_n, shards)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.close()
 
 if __name__ == "__main__":
     uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -5,7 +5,6 @@ from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import re
 import requests
-from bs4 import BeautifulSoup
 import numpy as np
 import time
 import os
@@ -15,6 +14,8 @@ import threading
 import socket
 import sys
 
+import text_extraction
+
 # Function to check if the API is running
 def is_api_running():
     try:
@@ -196,6 +197,8 @@ with st.sidebar:
         **API Endpoints:**
         - GET/POST `/recommend` - Get recommendations
         - GET `/health` - Check API status
+        - GET `/ready` - Check model loading progress
+        - WebSocket `/ws/typeahead` - As-you-type recommendations
         - GET `/docs` - API documentation
         """)
     else:
@@ -214,10 +217,7 @@ with st.sidebar:
 
 def extract_text_from_url(url: str) -> str:
     try:
-        res = requests.get(url, timeout=5)
-        soup = BeautifulSoup(res.content, 'html.parser')
-        paragraphs = soup.find_all("p")
-        return " ".join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+        return text_extraction.extract_text_from_url(url)
     except Exception as e:
         st.error(f"Error processing URL: {str(e)}")
         return ""
@@ -237,7 +237,10 @@ def recommend_api(query_text: str, top_n=5):
             timeout=10
         )
         
-        if response.status_code == 200:
+        if response.status_code == 503:
+            st.info("The API server is still loading the model. Please try again in a few seconds.")
+            return None
+        elif response.status_code == 200:
             data = response.json()
             # Transform response back to dataframe for consistent UI
             if len(data["recommendations"]) == 0:
@@ -373,7 +376,21 @@ with tab2:
 }
             </pre>
             
-            <h4>2. POST /recommend</h4>
+            <h4>2. GET /ready</h4>
+            <p>Check whether the model and catalog have finished loading. Returns 503 while loading.</p>
+            <p><strong>Response:</strong></p>
+            <pre class="api-code">
+{
+  "ready": true,
+  "stage": "ready",
+  "error": null,
+  "stage_timings": {"loading_model": 2.41, "loading_data": 0.12, "warming_up": 0.08},
+  "time_to_ready": 4.87,
+  "uptime": 12.3
+}
+            </pre>
+            
+            <h4>3. POST /recommend</h4>
             <p>Get recommendations based on a job description or query</p>
             <p><strong>Request:</strong></p>
             <pre class="api-code">
@@ -402,7 +419,7 @@ with tab2:
 }
             </pre>
             
-            <h4>3. GET /recommend</h4>
+            <h4>4. GET /recommend</h4>
             <p>Alternative to POST, get recommendations via query parameters</p>
             <p><strong>Parameters:</strong></p>
             <ul>
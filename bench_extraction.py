@@ -0,0 +1,104 @@
+"""
+Benchmark HTML-to-text extraction on a corpus of saved job pages.
+Compares text_extraction against the previous BeautifulSoup html.parser
+approach (and trafilatura, if installed) on every *.html/*.htm file in a
+directory. text_extraction stops once it has enough text for the encoder,
+so it also runs with its caps lifted. That row parses the whole page like
+bs4 does and is the like-for-like comparison.
+
+Usage: python bench_extraction.py path/to/saved_pages [--repeat 3]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import text_extraction
+
+
+def uncapped_extract(html: bytes) -> str:
+    return text_extraction.extract_text(html, max_chars=sys.maxsize, max_nodes=sys.maxsize, max_bytes=sys.maxsize)
+
+
+def bs4_paragraphs(html: bytes) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    paragraphs = soup.find_all("p")
+    return " ".join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+
+
+def trafilatura_extract(html: bytes) -> str:
+    import trafilatura
+
+    return trafilatura.extract(html.decode("utf-8", errors="replace")) or ""
+
+
+def available_extractors():
+    extractors = {"text_extraction": text_extraction.extract_text, "uncapped": uncapped_extract}
+    for name, func, module in (
+        ("bs4 html.parser", bs4_paragraphs, "bs4"),
+        ("trafilatura", trafilatura_extract, "trafilatura"),
+    ):
+        try:
+            __import__(module)
+            extractors[name] = func
+        except ImportError:
+            print(f"Skipping {name}: {module} is not installed")
+    return extractors
+
+
+def run(pages, extract, repeat: int):
+    total_bytes = sum(len(html) for html in pages) * repeat
+    chars = 0
+    worst = 0.0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            page_start = time.perf_counter()
+            chars += len(extract(html))
+            worst = max(worst, time.perf_counter() - page_start)
+    elapsed = time.perf_counter() - start
+    runs = len(pages) * repeat
+    return {
+        "pages_per_sec": runs / elapsed,
+        "mb_per_sec": total_bytes / elapsed / 1e6,
+        "avg_ms": elapsed / runs * 1000,
+        "worst_ms": worst * 1000,
+        "avg_chars": chars / runs,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark HTML-to-text extraction")
+    parser.add_argument("corpus", help="Directory of saved job pages (*.html, *.htm)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus per extractor")
+    args = parser.parse_args()
+
+    paths = sorted(
+        glob.glob(os.path.join(args.corpus, "**", "*.html"), recursive=True)
+        + glob.glob(os.path.join(args.corpus, "**", "*.htm"), recursive=True)
+    )
+    if not paths:
+        parser.error(f"No .html/.htm files found in {args.corpus}")
+
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    # Quote speedups together with this line: they depend heavily on page size
+    print(f"Corpus: {os.path.abspath(args.corpus)}, {len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f} MB")
+    extractors = available_extractors()
+
+    results = {name: run(pages, extract, args.repeat) for name, extract in extractors.items()}
+    baseline = results.get("bs4 html.parser")
+
+    print(f"\n{'extractor':<18}{'pages/s':>10}{'MB/s':>9}{'avg ms':>9}{'worst ms':>10}{'avg chars':>11}{'vs bs4':>8}")
+    for name, stats in results.items():
+        speedup = f"{stats['pages_per_sec'] / baseline['pages_per_sec']:.1f}x" if baseline else "-"
+        print(
+            f"{name:<18}{stats['pages_per_sec']:>10.1f}{stats['mb_per_sec']:>9.2f}"
+            f"{stats['avg_ms']:>9.2f}{stats['worst_ms']:>10.2f}{stats['avg_chars']:>11.0f}{speedup:>8}"
+        )
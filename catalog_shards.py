@@ -0,0 +1,200 @@
+"""
+Sharded catalog index for the SHL Assessment Recommender.
+Each shard is one catalog (e.g. SHL for a region/language, or internal
+assessments) with its own pickled artifact and version. Queries are scored
+on every requested shard in parallel and the per-shard top-k lists are merged.
+"""
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SHARD_NAME = "shl"
+DEFAULT_SHARD_PATH = "shl_catalog_with_embeddings.pkl"
+
+# Optional JSON manifest describing the shards to serve, e.g.
+# [{"name": "shl-en-us", "path": "catalogs/shl_en_us.pkl", "version": "2024-05"}]
+SHARDS_MANIFEST_ENV = "SHL_CATALOG_SHARDS"
+
+RESULT_COLUMNS = [
+    "Test Name", "Link", "Remote Testing", "Adaptive/IRT",
+    "duration", "Test Types",
+]
+
+
+class UnknownShardError(ValueError):
+    """Raised for a shard selection that is not a list of served shard names."""
+
+
+class ShardLoadError(RuntimeError):
+    """Raised when a shard artifact cannot be loaded."""
+
+
+def load_data(source):
+    catalog, embeddings = pd.read_pickle(source)
+    embeddings = np.vstack(embeddings).astype(np.float32)
+    # Normalise once so cosine similarity is a plain dot product per query
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings / np.where(norms == 0, 1, norms)
+    return catalog.reset_index(drop=True), embeddings
+
+
+def load_shard_specs() -> List[Dict[str, Any]]:
+    manifest = os.environ.get(SHARDS_MANIFEST_ENV)
+    if not manifest:
+        return [{"name": DEFAULT_SHARD_NAME, "path": DEFAULT_SHARD_PATH}]
+
+    with open(manifest) as f:
+        specs = json.load(f)
+
+    if not isinstance(specs, list) or not specs:
+        raise ValueError(f"{manifest} must list at least one shard")
+    for spec in specs:
+        if not isinstance(spec, dict) or not all(isinstance(spec.get(key), str) for key in ("name", "path")):
+            raise ValueError(f"Every shard in {manifest} needs a string name and path: {spec!r}")
+    names = [spec["name"] for spec in specs]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Duplicate shard names in {manifest}")
+    return specs
+
+
+class CatalogShard:
+    """One loaded catalog artifact and its normalised embeddings."""
+
+    def __init__(self, name: str, path: str, version: Optional[str] = None):
+        self.name = name
+        self.path = path
+        # Hash and unpickle the same bytes, so an unpinned version always
+        # matches the rows served, even for a same-size rewrite within a second
+        with open(path, "rb") as f:
+            content = f.read()
+        self.version = version or hashlib.sha256(content).hexdigest()[:12]
+        self.catalog, self.embeddings = load_data(io.BytesIO(content))
+        self.names = self.catalog["Test Name"].to_numpy()
+        self.loaded_at = time.time()
+
+    def memory_bytes(self) -> int:
+        return int(self.embeddings.nbytes + self.catalog.memory_usage(deep=True).sum())
+
+    def top_k(self, query_embedding: np.ndarray, top_n: int) -> pd.DataFrame:
+        scores = self.embeddings @ query_embedding
+        order = np.argsort(-scores, kind="stable")
+
+        # Keep the best-scoring row per test name within this shard
+        first_of_name = ~pd.Series(self.names[order]).duplicated().to_numpy()
+        rows = order[first_of_name][:top_n]
+
+        results = self.catalog.loc[rows, RESULT_COLUMNS].copy()
+        results["similarity"] = scores[rows]
+        results["shard"] = self.name
+        results["row"] = rows
+        return results
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "version": self.version,
+            "rows": len(self.catalog),
+            "memory_bytes": self.memory_bytes(),
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ShardedIndex:
+    """Serves several catalog shards and merges their results."""
+
+    def __init__(self, specs: List[Dict[str, Any]], max_workers: Optional[int] = None, specs_loader=None):
+        if not specs:
+            raise ValueError("At least one shard is required")
+        self.specs = {spec["name"]: spec for spec in specs}
+        # Called on reload so an edited manifest entry (path, version) is picked up
+        self._specs_loader = specs_loader
+        self._shards: Dict[str, CatalogShard] = {}
+        self._lock = threading.Lock()
+        # numpy releases the GIL for the matrix product, so threads are enough
+        workers = max_workers or min(len(specs), os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="shard")
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.specs)
+
+    def _load_shard(self, name: str) -> CatalogShard:
+        spec = self.specs[name]
+        return CatalogShard(name, spec["path"], spec.get("version"))
+
+    def load_all(self):
+        for name in self.specs:
+            self.reload(name)
+
+    def reload(self, name: str) -> CatalogShard:
+        if name not in self.specs:
+            raise UnknownShardError(f"Unknown shard: {name}")
+        # Load outside the lock so queries keep using the old shard meanwhile
+        try:
+            if self._specs_loader is not None:
+                fresh = {spec["name"]: spec for spec in self._specs_loader()}
+                if name in fresh:
+                    self.specs[name] = fresh[name]
+            shard = self._load_shard(name)
+        except Exception as e:
+            with self._lock:
+                serving = self._shards.get(name)
+            still = f"; version {serving.version} is still serving" if serving else ""
+            raise ShardLoadError(f"Could not load shard '{name}': {str(e)}{still}") from e
+        with self._lock:
+            self._shards[name] = shard
+        print(f"Loaded shard '{name}' (version {shard.version}, {len(shard.catalog)} rows)")
+        return shard
+
+    def get(self, names: Optional[List[str]] = None) -> List[CatalogShard]:
+        with self._lock:
+            shards = dict(self._shards)
+
+        if not names:
+            return list(shards.values())
+
+        # A bare string would otherwise be iterated as single-character names
+        if not isinstance(names, (list, tuple)) or not all(isinstance(name, str) for name in names):
+            raise UnknownShardError("Shards must be a list of shard names")
+        unknown = [name for name in names if name not in shards]
+        if unknown:
+            raise UnknownShardError(f"Unknown shard(s): {', '.join(unknown)}")
+        return [shards[name] for name in dict.fromkeys(names)]
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        top_n: int = 5,
+        shards: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        return self.search_shards(self.get(shards), query_embedding, top_n)
+
+    def search_shards(
+        self,
+        targets: List[CatalogShard],
+        query_embedding: np.ndarray,
+        top_n: int = 5,
+    ) -> pd.DataFrame:
+        """Search shards already taken from get(), e.g. to report their versions."""
+        if len(targets) == 1:
+            partials = [targets[0].top_k(query_embedding, top_n)]
+        else:
+            partials = list(self._pool.map(lambda shard: shard.top_k(query_embedding, top_n), targets))
+
+        merged = pd.concat(partials, ignore_index=True)
+        # The same test can appear in several shards; keep its best score
+        merged = merged.sort_values("similarity", ascending=False, kind="stable")
+        return merged.drop_duplicates(subset=["Test Name"]).head(top_n)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [shard.describe() for shard in self.get()]
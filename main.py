@@ -1,8 +1,7 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from model_utils import get_top_matches
-import trafilatura
-import requests
+from text_extraction import extract_text_from_url
 
 app = FastAPI()
 
@@ -16,8 +15,10 @@ def recommend(input_data: QueryInput):
         raise HTTPException(status_code=400, detail="Provide either a query or a URL.")
 
     if input_data.url:
-        downloaded = trafilatura.fetch_url(input_data.url)
-        text = trafilatura.extract(downloaded)
+        try:
+            text = extract_text_from_url(input_data.url)
+        except Exception:
+            text = ""
         if not text:
             raise HTTPException(status_code=400, detail="Failed to extract content from URL.")
         query = text
@@ -0,0 +1,163 @@
+"""
+Opt-in per-request profiling for the SHL Assessment Recommender API.
+A request is profiled when it sends the X-Profile header (only honoured when
+SHL_PROFILING=1) or when it is picked by SHL_PROFILE_SAMPLE_RATE. The profile
+covers the whole request handler with cProfile, plus per-stage wall times and
+input sizes. It is either returned inline or saved to a bounded on-disk ring
+buffer of the most recent profiles.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from typing import Any, Dict, Optional
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# With both settings left at their defaults, maybe_profile() is a couple of
+# attribute checks and unprofiled requests pay nothing else
+HEADER_ENABLED = os.environ.get("SHL_PROFILING", "0") == "1"
+SAMPLE_RATE = float(os.environ.get("SHL_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.environ.get("SHL_PROFILE_DIR", "profiles")
+MAX_PROFILES = int(os.environ.get("SHL_PROFILE_MAX_FILES", "50"))
+TOP_FUNCTIONS = 25
+
+_NO_STAGE = nullcontext()
+_ring_lock = threading.Lock()
+# Only one request is profiled at a time. From Python 3.12 cProfile is built
+# on sys.monitoring, so a second concurrent enable() raises ValueError.
+_profiling_lock = threading.Lock()
+
+
+class _Stage:
+    def __init__(self, profile: "RequestProfile", name: str):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.profile.stages[self.name] = round(self.profile.stages.get(self.name, 0) + elapsed, 6)
+
+
+class RequestProfile:
+    """cProfile capture plus stage timings for a single request."""
+
+    def __init__(self, inline: bool, trigger: str):
+        # Nanoseconds since the epoch sort correctly regardless of local time
+        # zone or DST; the suffix keeps ids from several workers apart
+        self.id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        self.inline = inline
+        self.trigger = trigger
+        self.active = False
+        self.total: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.info: Dict[str, Any] = {}
+        self._profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        # cProfile only sees the calling thread; work fanned out to the shard
+        # pool still shows up in the "ranking" stage time
+        try:
+            self._profiler.enable()
+        except ValueError as e:
+            # Another sys.monitoring tool (e.g. a debugger or coverage) holds
+            # the profiler slot; serve the request unprofiled
+            _profiling_lock.release()
+            print(f"Could not start profiler: {str(e)}")
+            return self
+        self.active = True
+        return self
+
+    def __exit__(self, *exc):
+        if not self.active:
+            return
+        self.active = False
+        try:
+            self._profiler.disable()
+            self.total = round(time.perf_counter() - self._start, 6)
+        finally:
+            _profiling_lock.release()
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def summary(self) -> Dict[str, Any]:
+        out = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=out)
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "total_seconds": self.total,
+            "stages": self.stages,
+            "info": self.info,
+            "top_functions": out.getvalue(),
+        }
+
+    def save(self) -> Optional[str]:
+        """Write the profile to the ring buffer; returns its id, or None on failure."""
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            base = os.path.join(PROFILE_DIR, self.id)
+            self._profiler.dump_stats(base + ".prof")
+            with open(base + ".json", "w") as f:
+                json.dump(self.summary(), f, indent=2)
+            _prune_ring_buffer()
+        except OSError as e:
+            # A full or read-only profile directory must not fail the request
+            print(f"Error saving profile {self.id}: {str(e)}")
+            return None
+        return self.id
+
+
+def _prune_ring_buffer():
+    with _ring_lock:
+        ids = sorted({os.path.splitext(name)[0] for name in os.listdir(PROFILE_DIR)
+                      if name.endswith((".prof", ".json"))})
+        # Ids start with a timestamp, so sorting them puts the oldest first
+        for stale in ids[:max(len(ids) - MAX_PROFILES, 0)]:
+            for ext in (".prof", ".json"):
+                try:
+                    os.remove(os.path.join(PROFILE_DIR, stale + ext))
+                except FileNotFoundError:
+                    pass
+
+
+def maybe_profile(headers) -> Optional[RequestProfile]:
+    """Return a RequestProfile if this request should be profiled, else None.
+
+    X-Profile: inline returns the profile in the response body, any other
+    value saves it to the ring buffer. Sampled requests are always saved.
+    If another request is already being profiled, this one is not; the
+    returned profile must be entered, as exiting it frees the profiler.
+    After the with block, total is None if the profiler could not start.
+    """
+    profile = None
+    if HEADER_ENABLED:
+        mode = headers.get(PROFILE_HEADER)
+        if mode:
+            profile = RequestProfile(inline=mode.lower() == "inline", trigger="header")
+    if profile is None and SAMPLE_RATE and random.random() < SAMPLE_RATE:
+        profile = RequestProfile(inline=False, trigger="sample")
+    if profile is None or not _profiling_lock.acquire(blocking=False):
+        return None
+    return profile
+
+
+def stage(profile: Optional[RequestProfile], name: str):
+    """Time a pipeline stage when profiling, otherwise a shared no-op context."""
+    if profile is None:
+        return _NO_STAGE
+    return profile.stage(name)
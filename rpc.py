@@ -0,0 +1,309 @@
+"""
+Binary RPC interface for internal callers of the SHL Assessment Recommender.
+Runs alongside the REST API on a persistent TCP connection. Each message is a
+4-byte big-endian length followed by a msgpack body:
+
+    request:  {"id": 1, "m": "recommend", "p": {"q": "python developer", "k": 5}}
+    response: {"id": 1, "r": {"v": {0: "1712345678-12345"}, "hits": [[0, 42, 0.8123], ...]}}
+    error:    {"id": 1, "e": "not_ready"}
+
+A hit is [shard_code, row_id, score]. The "catalog" method returns the display
+metadata for every row of every shard together with its version, so callers
+can cache it and only refetch when a version in "v" changes. Requests on one
+connection may be pipelined; responses carry the request id.
+
+Methods: recommend {q, k, s}, batch {qs, k, s}, stream {qs, k, s} (one frame
+per query, then {"id": ..., "end": true}) and catalog {s}. "q"/"qs" are query
+texts; unlike the REST API, URLs are not fetched and would be embedded as
+literal text. "k" is 1-MAX_TOP_N (default 5) and "s" optionally restricts the
+search to a list of shard names. A frame that cannot be decoded gets an error
+response with "id" set to nil.
+
+The server is off unless SHL_RPC_PORT is set for api.py. Run
+`python rpc.py "query"` to try it against a local server.
+"""
+
+import argparse
+import asyncio
+import socket
+import struct
+from typing import Any, Dict, Iterator, List, Optional
+
+import msgpack
+
+from catalog_shards import RESULT_COLUMNS
+
+DEFAULT_RPC_PORT = 8001
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+MAX_IN_FLIGHT = 32
+MAX_TOP_N = 100
+
+_HEADER = struct.Struct(">I")
+
+
+class RpcError(Exception):
+    pass
+
+
+def _frame(obj) -> bytes:
+    body = msgpack.packb(obj, use_bin_type=True, use_single_float=True)
+    return _HEADER.pack(len(body)) + body
+
+
+def _query_param(params) -> str:
+    query = params.get("q")
+    if not isinstance(query, str) or not query.strip():
+        raise RpcError("'q' must be a non-empty string")
+    return query
+
+
+def _queries_param(params) -> List[str]:
+    queries = params.get("qs")
+    if not isinstance(queries, list) or not all(isinstance(q, str) and q.strip() for q in queries):
+        raise RpcError("'qs' must be a list of non-empty strings")
+    return queries
+
+
+def _top_n_param(params) -> int:
+    top_n = params.get("k", 5)
+    if isinstance(top_n, bool) or not isinstance(top_n, int) or not 1 <= top_n <= MAX_TOP_N:
+        raise RpcError(f"'k' must be an integer from 1 to {MAX_TOP_N}")
+    return top_n
+
+
+# Handlers run on a worker thread; engine is the (model, index) pair from api.py
+
+def _shard_codes(index) -> Dict[str, int]:
+    return {name: code for code, name in enumerate(index.names)}
+
+
+def _search(index, embeddings, top_n: int, shards) -> Dict[str, Any]:
+    # One snapshot of the shards for both the hits and "v", so a concurrent
+    # reload cannot pair a version with row ids from another artifact
+    targets = index.get(shards)
+    codes = _shard_codes(index)
+    hits = []
+    for embedding in embeddings:
+        results = index.search_shards(targets, embedding, top_n=top_n)
+        hits.append([
+            [codes[shard], int(row), float(score)]
+            for shard, row, score in zip(results["shard"], results["row"], results["similarity"])
+        ])
+    return {"v": {codes[shard.name]: shard.version for shard in targets}, "hits": hits}
+
+
+def _recommend(engine, params) -> Dict[str, Any]:
+    model, index = engine
+    query = _query_param(params)
+    top_n = _top_n_param(params)
+    embedding = model.encode([query], normalize_embeddings=True)[0]
+    result = _search(index, [embedding], top_n, params.get("s"))
+    return {"v": result["v"], "hits": result["hits"][0]}
+
+
+def _batch(engine, params) -> Dict[str, Any]:
+    model, index = engine
+    queries = _queries_param(params)
+    top_n = _top_n_param(params)
+    # One encoder call for the whole batch is the point of this method
+    embeddings = model.encode(queries, normalize_embeddings=True) if queries else []
+    return _search(index, embeddings, top_n, params.get("s"))
+
+
+def _catalog(engine, params) -> Dict[str, Any]:
+    _, index = engine
+    codes = _shard_codes(index)
+    return {
+        "columns": RESULT_COLUMNS,
+        "shards": [
+            {
+                "code": codes[shard.name],
+                "name": shard.name,
+                "version": shard.version,
+                "rows": shard.catalog[RESULT_COLUMNS].fillna("").astype(str).values.tolist(),
+            }
+            for shard in index.get(params.get("s"))
+        ],
+    }
+
+
+_METHODS = {"recommend": _recommend, "batch": _batch, "catalog": _catalog}
+
+
+class RecommendServer:
+    """Serves RPC connections using the engine returned by get_engine().
+
+    get_engine() returns the (model, index) pair, or None while loading.
+    """
+
+    def __init__(self, get_engine, max_in_flight: int = MAX_IN_FLIGHT):
+        self.get_engine = get_engine
+        self.max_in_flight = max_in_flight
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+
+        def finished(task):
+            tasks.discard(task)
+            slots.release()
+
+        try:
+            while True:
+                (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+                if size > MAX_FRAME_BYTES:
+                    print(f"RPC frame of {size} bytes exceeds limit, closing connection")
+                    break
+                body = await reader.readexactly(size)
+                try:
+                    message = msgpack.unpackb(body, raw=False, strict_map_key=False)
+                except (ValueError, msgpack.UnpackException) as e:
+                    # The length prefix keeps the stream in sync, so just reject this frame
+                    await self._send(writer, write_lock, {"id": None, "e": f"Malformed frame: {str(e)}"})
+                    continue
+
+                # Stop reading once max_in_flight calls are pending on this connection
+                await slots.acquire()
+                task = asyncio.ensure_future(self._dispatch(message, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(finished)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in list(tasks):
+                task.cancel()
+            writer.close()
+
+    async def _send(self, writer, write_lock, obj):
+        async with write_lock:
+            writer.write(_frame(obj))
+            await writer.drain()
+
+    async def _dispatch(self, message, writer, write_lock):
+        call_id = message.get("id") if isinstance(message, dict) else None
+        loop = asyncio.get_event_loop()
+        try:
+            try:
+                if not isinstance(message, dict):
+                    raise RpcError("Request must be a map")
+                engine = self.get_engine()
+                if engine is None:
+                    raise RpcError("not_ready")
+
+                method = message.get("m")
+                params = message.get("p") or {}
+                if not isinstance(params, dict):
+                    raise RpcError("'p' must be a map")
+                if method == "stream":
+                    _top_n_param(params)
+                    for query in _queries_param(params):
+                        single = dict(params, q=query)
+                        result = await loop.run_in_executor(None, _recommend, engine, single)
+                        await self._send(writer, write_lock, {"id": call_id, "r": result})
+                    await self._send(writer, write_lock, {"id": call_id, "end": True})
+                    return
+
+                handler = _METHODS.get(method)
+                if handler is None:
+                    raise RpcError(f"Unknown method: {method}")
+                result = await loop.run_in_executor(None, handler, engine, params)
+            except (ConnectionError, asyncio.CancelledError):
+                raise
+            except Exception as e:
+                await self._send(writer, write_lock, {"id": call_id, "e": str(e)})
+                return
+            await self._send(writer, write_lock, {"id": call_id, "r": result})
+        except (ConnectionError, asyncio.CancelledError):
+            # The caller went away; nothing left to reply to
+            pass
+
+
+async def serve(get_engine, host: str = "127.0.0.1", port: int = DEFAULT_RPC_PORT):
+    server = RecommendServer(get_engine)
+    rpc_server = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"RPC server listening on {host}:{port}")
+    return rpc_server
+
+
+class RpcClient:
+    """Blocking client holding one persistent connection. Not thread-safe."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_RPC_PORT, timeout: float = 10):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        self._next_id = 0
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _send(self, method: str, params: Dict[str, Any]) -> int:
+        self._next_id += 1
+        self._sock.sendall(_frame({"id": self._next_id, "m": method, "p": params}))
+        return self._next_id
+
+    def _receive(self, call_id: int) -> Dict[str, Any]:
+        header = self._reader.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ConnectionError("RPC server closed the connection")
+        (size,) = _HEADER.unpack(header)
+        message = msgpack.unpackb(self._reader.read(size), raw=False, strict_map_key=False)
+        if message.get("id") != call_id:
+            raise RpcError(f"Unexpected response id {message.get('id')} (expected {call_id})")
+        if "e" in message:
+            raise RpcError(message["e"])
+        return message
+
+    def _call(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._receive(self._send(method, params))["r"]
+
+    @staticmethod
+    def _params(top_n: int, shards: Optional[List[str]], **extra) -> Dict[str, Any]:
+        params = dict(extra, k=top_n)
+        if shards:
+            params["s"] = shards
+        return params
+
+    def recommend(self, query: str, top_n: int = 5, shards: Optional[List[str]] = None) -> Dict[str, Any]:
+        return self._call("recommend", self._params(top_n, shards, q=query))
+
+    def recommend_batch(self, queries: List[str], top_n: int = 5, shards: Optional[List[str]] = None) -> Dict[str, Any]:
+        return self._call("batch", self._params(top_n, shards, qs=queries))
+
+    def recommend_stream(self, queries: List[str], top_n: int = 5, shards: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        call_id = self._send("stream", self._params(top_n, shards, qs=queries))
+        while True:
+            message = self._receive(call_id)
+            if message.get("end"):
+                return
+            yield message["r"]
+
+    def catalog(self, shards: Optional[List[str]] = None) -> Dict[str, Any]:
+        return self._call("catalog", {"s": shards} if shards else {})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the recommender over the binary RPC interface")
+    parser.add_argument("queries", nargs="+", help="Job queries to recommend assessments for")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_RPC_PORT)
+    parser.add_argument("--top-n", type=int, default=5)
+    args = parser.parse_args()
+
+    with RpcClient(args.host, args.port) as client:
+        names = {
+            shard["code"]: [row[0] for row in shard["rows"]]
+            for shard in client.catalog()["shards"]
+        }
+        for query, result in zip(args.queries, client.recommend_stream(args.queries, top_n=args.top_n)):
+            print(query)
+            for shard_code, row, score in result["hits"]:
+                print(f"  {score:.3f}  {names[shard_code][row]}")
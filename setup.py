@@ -11,6 +11,7 @@ setup(
         "scikit-learn",
         "pandas",
         "beautifulsoup4",
+        "lxml",
         "requests",
         "selenium",
         "trafilatura",
@@ -18,7 +19,9 @@ setup(
         "torch",
         "fastapi",
         "uvicorn",
+        "websockets",
         "numpy",
+        "msgpack",
     ],
     author="Your Name",
     author_email="your.email@example.com",
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def write_shard(tmp_path):
+    """Write a (catalog, embeddings) pickle and return its path."""
+
+    def write(name, test_names, vectors):
+        catalog = pd.DataFrame({
+            "Test Name": test_names,
+            "Link": [f"https://example.com/{test_name}" for test_name in test_names],
+            "Remote Testing": "Yes",
+            "Adaptive/IRT": "No",
+            "duration": "10",
+            "Test Types": "K",
+        })
+        path = tmp_path / f"{name}.pkl"
+        pd.to_pickle((catalog, [np.asarray(v, dtype=np.float32) for v in vectors]), path)
+        return str(path)
+
+    return write
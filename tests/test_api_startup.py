@@ -0,0 +1,109 @@
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+import api
+
+
+class StubModel:
+    def encode(self, texts, normalize_embeddings=True):
+        return np.array([[1, 0] for _ in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def loader(monkeypatch, write_shard):
+    """Patches the loader so startup blocks until release is set."""
+    release = threading.Event()
+    specs = [{"name": "a", "path": write_shard("a", ["Python", "Sales"], [[1, 0], [0, 1]])}]
+
+    def load_model():
+        release.wait(timeout=10)
+        if getattr(release, "error", None):
+            raise RuntimeError(release.error)
+        return StubModel()
+
+    monkeypatch.setattr(api, "load_model", load_model)
+    monkeypatch.setattr(api, "load_shard_specs", lambda: specs)
+    monkeypatch.setattr(api, "model", None)
+    monkeypatch.setattr(api, "index", None)
+    monkeypatch.setattr(api, "_ready", threading.Event())
+    monkeypatch.setattr(api, "_startup", {
+        "stage": "starting", "error": None, "stage_timings": {}, "time_to_ready": None,
+    })
+    return release
+
+
+def wait_for_stage(stage):
+    for _ in range(500):
+        if api._startup["stage"] == stage:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError(f"Startup never reached {stage}: {api._startup}")
+
+
+def test_serves_liveness_but_not_recommendations_while_loading(loader):
+    with TestClient(api.app) as client:
+        wait_for_stage("loading_model")
+
+        assert client.get("/health").status_code == 200
+        ready = client.get("/ready")
+        assert ready.status_code == 503
+        assert ready.json()["ready"] is False
+        assert ready.json()["stage"] == "loading_model"
+        assert client.post("/recommend", json={"query": "python"}).status_code == 503
+        assert client.get("/recommend", params={"query": "python"}).status_code == 503
+        assert client.get("/shards").status_code == 503
+        with client.websocket_connect("/ws/typeahead") as ws:
+            assert "not ready" in ws.receive_json()["error"]
+
+        loader.set()
+
+
+def test_becomes_ready_after_background_load(loader):
+    loader.set()
+    with TestClient(api.app) as client:
+        assert api._ready.wait(timeout=10)
+
+        ready = client.get("/ready")
+        assert ready.status_code == 200
+        body = ready.json()
+        assert body["stage"] == "ready"
+        assert set(body["stage_timings"]) == {"loading_model", "loading_data", "warming_up"}
+        assert body["time_to_ready"] is not None
+
+        response = client.post("/recommend", json={"query": "python developer", "top_n": 1})
+        assert response.status_code == 200
+        assert [r["test_name"] for r in response.json()["recommendations"]] == ["Python"]
+        assert [s["name"] for s in client.get("/shards").json()["shards"]] == ["a"]
+
+
+def test_reports_failed_load(loader):
+    loader.error = "model files missing"
+    loader.set()
+    with TestClient(api.app) as client:
+        wait_for_stage("failed")
+
+        ready = client.get("/ready")
+        assert ready.status_code == 503
+        assert ready.json()["error"] == "model files missing"
+        assert client.get("/health").status_code == 200
+        assert client.post("/recommend", json={"query": "python"}).status_code == 503
+
+
+def test_failed_reload_reports_old_shard_still_serving(loader, tmp_path):
+    loader.set()
+    with TestClient(api.app) as client:
+        assert api._ready.wait(timeout=10)
+        version = api.index.get(["a"])[0].version
+        (tmp_path / "a.pkl").unlink()
+
+        response = client.post("/shards/a/reload")
+        assert response.status_code == 500
+        assert f"{version} is still serving" in response.json()["detail"]
+        assert client.post("/recommend", json={"query": "python"}).status_code == 200
+        assert client.post("/shards/missing/reload").status_code == 404
@@ -0,0 +1,127 @@
+import json
+
+import numpy as np
+import pytest
+
+from catalog_shards import SHARDS_MANIFEST_ENV, ShardedIndex, ShardLoadError, UnknownShardError, load_shard_specs
+
+
+@pytest.fixture
+def index(write_shard):
+    # The query is [1, 0]; a vector's cosine score is its angle's cosine
+    specs = [
+        {"name": "a", "path": write_shard("a",
+            ["Python", "Python", "Sales", "Excel"],
+            [[1, 0.1], [1, 0.5], [0.2, 1], [0.6, 1]])},
+        {"name": "b", "path": write_shard("b",
+            ["Java", "Python", "Numeracy"],
+            [[1, 0.3], [1, 0], [0, 1]]), "version": "v2"},
+    ]
+    index = ShardedIndex(specs)
+    index.load_all()
+    return index
+
+
+QUERY = np.array([1, 0], dtype=np.float32)
+
+
+def test_merges_top_k_across_shards(index):
+    results = index.search(QUERY, top_n=3)
+
+    assert list(results["Test Name"]) == ["Python", "Java", "Excel"]
+    assert list(results["shard"]) == ["b", "b", "a"]
+    assert results["similarity"].is_monotonic_decreasing
+
+
+def test_dedups_test_name_across_shards_keeping_best_score(index):
+    results = index.search(QUERY, top_n=10)
+
+    assert results["Test Name"].is_unique
+    python = results[results["Test Name"] == "Python"].iloc[0]
+    # Shard b's exact match beats both of shard a's Python rows
+    assert python["shard"] == "b"
+    assert python["row"] == 1
+    assert python["similarity"] == pytest.approx(1.0)
+
+
+def test_dedups_within_a_shard(index):
+    results = index.search(QUERY, top_n=10, shards=["a"])
+
+    assert list(results["Test Name"]) == ["Python", "Excel", "Sales"]
+    assert results.iloc[0]["row"] == 0
+
+
+def test_search_selected_shards_only(index):
+    results = index.search(QUERY, top_n=10, shards=["b"])
+
+    assert set(results["shard"]) == {"b"}
+    assert len(results) == 3
+
+
+@pytest.mark.parametrize("shards", [["missing"], "a", [1]])
+def test_rejects_invalid_shard_selection(index, shards):
+    with pytest.raises(UnknownShardError):
+        index.search(QUERY, shards=shards)
+
+
+def test_reload_swaps_one_shard(index, write_shard):
+    before = index.get(["a"])[0]
+    write_shard("b", ["Go"], [[1, 0]])
+    index.reload("b")
+
+    assert index.get(["a"])[0] is before
+    assert list(index.search(QUERY, top_n=10, shards=["b"])["Test Name"]) == ["Go"]
+    with pytest.raises(UnknownShardError):
+        index.reload("missing")
+
+
+def test_describe_reports_version_and_memory(index):
+    described = {shard["name"]: shard for shard in index.describe()}
+
+    assert described["b"]["version"] == "v2"
+    assert described["a"]["rows"] == 4
+    assert described["a"]["memory_bytes"] > 0
+
+
+def test_unpinned_version_follows_content(write_shard):
+    path = write_shard("c", ["Go"], [[1, 0]])
+    index = ShardedIndex([{"name": "c", "path": path}])
+    first = index.reload("c").version
+
+    # Same size, written within the same second
+    write_shard("c", ["Py"], [[1, 0]])
+    assert index.reload("c").version != first
+
+
+def test_failed_reload_keeps_serving_old_shard(index, tmp_path):
+    with open(tmp_path / "b.pkl", "wb") as f:
+        f.write(b"not a pickle")
+
+    with pytest.raises(ShardLoadError, match="v2 is still serving"):
+        index.reload("b")
+    assert index.get(["b"])[0].version == "v2"
+    assert len(index.search(QUERY, top_n=10, shards=["b"])) == 3
+
+
+def test_reload_rereads_manifest_entry(write_shard, tmp_path, monkeypatch):
+    manifest = tmp_path / "shards.json"
+    manifest.write_text(json.dumps([{"name": "c", "path": write_shard("c", ["Go"], [[1, 0]]), "version": "1"}]))
+    monkeypatch.setenv(SHARDS_MANIFEST_ENV, str(manifest))
+    index = ShardedIndex(load_shard_specs(), specs_loader=load_shard_specs)
+    index.load_all()
+
+    manifest.write_text(json.dumps([{"name": "c", "path": write_shard("d", ["Rust"], [[1, 0]]), "version": "2"}]))
+    shard = index.reload("c")
+
+    assert shard.version == "2"
+    assert list(index.search(QUERY, shards=["c"])["Test Name"]) == ["Rust"]
+
+
+@pytest.mark.parametrize("manifest", [[], {}, [{"name": "a"}], [{"path": "a.pkl"}], [{"name": 1, "path": "a.pkl"}]])
+def test_rejects_invalid_manifest(manifest, tmp_path, monkeypatch):
+    path = tmp_path / "shards.json"
+    path.write_text(json.dumps(manifest))
+    monkeypatch.setenv(SHARDS_MANIFEST_ENV, str(path))
+
+    with pytest.raises(ValueError):
+        load_shard_specs()
@@ -0,0 +1,104 @@
+import json
+import os
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "HEADER_ENABLED", True)
+    monkeypatch.setattr(profiling, "SAMPLE_RATE", 0)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "MAX_PROFILES", 3)
+    yield monkeypatch
+    assert not profiling._profiling_lock.locked()
+
+
+def run(profile):
+    with profile:
+        with profiling.stage(profile, "work"):
+            sum(range(1000))
+    return profile
+
+
+def test_no_profile_by_default(settings):
+    settings.setattr(profiling, "HEADER_ENABLED", False)
+
+    assert profiling.maybe_profile({"X-Profile": "inline"}) is None
+    assert profiling.maybe_profile({}) is None
+
+
+def test_header_trigger(settings):
+    inline = run(profiling.maybe_profile({"X-Profile": "inline"}))
+    saved = run(profiling.maybe_profile({"X-Profile": "1"}))
+
+    assert (inline.trigger, inline.inline) == ("header", True)
+    assert (saved.trigger, saved.inline) == ("header", False)
+
+
+def test_sample_trigger(settings):
+    settings.setattr(profiling, "HEADER_ENABLED", False)
+    settings.setattr(profiling, "SAMPLE_RATE", 1.0)
+
+    profile = run(profiling.maybe_profile({}))
+    assert (profile.trigger, profile.inline) == ("sample", False)
+
+
+def test_skips_while_another_request_is_profiled(settings):
+    first = profiling.maybe_profile({"X-Profile": "inline"})
+    with first:
+        assert profiling.maybe_profile({"X-Profile": "inline"}) is None
+
+    assert run(profiling.maybe_profile({"X-Profile": "inline"})).total is not None
+
+
+def test_releases_lock_when_request_fails(settings):
+    profile = profiling.maybe_profile({"X-Profile": "inline"})
+    with pytest.raises(RuntimeError):
+        with profile:
+            raise RuntimeError("boom")
+
+    assert profile.total is not None
+
+
+def test_releases_lock_when_profiler_cannot_start(settings):
+    profile = profiling.maybe_profile({"X-Profile": "inline"})
+
+    def enable():
+        raise ValueError("Another profiling tool is already active")
+
+    settings.setattr(profile._profiler, "enable", enable)
+    run(profile)
+
+    assert profile.total is None
+
+
+def test_inline_summary_shape(settings):
+    profile = run(profiling.maybe_profile({"X-Profile": "inline"}))
+    profile.info["tokens"] = 3
+    summary = profile.summary()
+
+    assert set(summary) == {"id", "trigger", "total_seconds", "stages", "info", "top_functions"}
+    assert summary["id"] == profile.id
+    assert summary["total_seconds"] >= summary["stages"]["work"] > 0
+    assert summary["info"] == {"tokens": 3}
+    assert "function calls" in summary["top_functions"]
+    json.dumps(summary)
+
+
+def test_ring_buffer_keeps_most_recent(settings, tmp_path):
+    ids = [run(profiling.maybe_profile({"X-Profile": "1"})).save() for _ in range(5)]
+
+    assert ids == sorted(ids)
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        profile_id + ext for profile_id in ids[-3:] for ext in (".json", ".prof")
+    )
+
+
+def test_save_failure_is_not_fatal(settings, tmp_path):
+    settings.setattr(profiling, "PROFILE_DIR", str(tmp_path / "file"))
+    (tmp_path / "file").write_text("")
+
+    assert run(profiling.maybe_profile({"X-Profile": "1"})).save() is None
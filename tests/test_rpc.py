@@ -0,0 +1,159 @@
+import asyncio
+import socket
+import struct
+import threading
+
+import msgpack
+import numpy as np
+import pytest
+
+import rpc
+from catalog_shards import ShardedIndex
+
+
+class StubModel:
+    """Maps each known query to a fixed unit vector, like a tiny encoder."""
+
+    VECTORS = {"python": [1, 0], "sales": [0, 1]}
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.calls.append(list(texts))
+        return np.array([self.VECTORS.get(text, [0.7, 0.7]) for text in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def engine(write_shard):
+    index = ShardedIndex([
+        {"name": "a", "path": write_shard("a", ["Python", "Sales"], [[1, 0], [0, 1]]), "version": "a1"},
+        {"name": "b", "path": write_shard("b", ["Java", "Python"], [[1, 0.2], [1, 0.1]]), "version": "b1"},
+    ])
+    index.load_all()
+    return StubModel(), index
+
+
+@pytest.fixture
+def server(engine):
+    """Runs RecommendServer on an ephemeral localhost port; yields (port, state)."""
+    state = {"engine": engine}
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    rpc_server = asyncio.run_coroutine_threadsafe(
+        rpc.serve(lambda: state["engine"], host="127.0.0.1", port=0), loop
+    ).result(timeout=5)
+    port = rpc_server.sockets[0].getsockname()[1]
+
+    yield port, state
+
+    async def shutdown():
+        rpc_server.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await rpc_server.wait_closed()
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
+
+
+@pytest.fixture
+def client(server):
+    port, _ = server
+    with rpc.RpcClient("127.0.0.1", port, timeout=5) as client:
+        yield client
+
+
+def test_recommend_returns_compact_hits_and_versions(client):
+    result = client.recommend("python", top_n=2)
+
+    assert result["v"] == {0: "a1", 1: "b1"}
+    # Python is in both shards; shard a's exact match wins, then Java from b
+    assert [hit[:2] for hit in result["hits"]] == [[0, 0], [1, 0]]
+    assert result["hits"][0][2] == pytest.approx(1.0)
+
+
+def test_recommend_selected_shards(client):
+    result = client.recommend("python", top_n=5, shards=["b"])
+
+    assert result["v"] == {1: "b1"}
+    assert {hit[0] for hit in result["hits"]} == {1}
+
+
+def test_batch_encodes_all_queries_in_one_call(client, engine):
+    model, _ = engine
+    result = client.recommend_batch(["python", "sales"], top_n=1, shards=["a"])
+
+    assert model.calls == [["python", "sales"]]
+    assert result["v"] == {0: "a1"}
+    assert result["hits"] == [[[0, 0, pytest.approx(1.0)]], [[0, 1, pytest.approx(1.0)]]]
+
+
+def test_stream_sends_one_frame_per_query(client):
+    results = list(client.recommend_stream(["python", "sales"], top_n=1, shards=["a"]))
+
+    assert [r["hits"][0][1] for r in results] == [0, 1]
+
+
+def test_catalog_returns_rows_by_shard(client):
+    catalog = client.catalog(["b"])
+
+    assert catalog["columns"][0] == "Test Name"
+    (shard,) = catalog["shards"]
+    assert (shard["code"], shard["name"], shard["version"]) == (1, "b", "b1")
+    assert [row[0] for row in shard["rows"]] == ["Java", "Python"]
+
+
+def test_connection_is_reused_across_calls(client):
+    for _ in range(3):
+        assert client.recommend("sales", top_n=1, shards=["a"])["hits"][0][1] == 1
+
+
+@pytest.mark.parametrize("method, params, message", [
+    ("recommend", {}, "'q' must be a non-empty string"),
+    ("recommend", {"q": "python", "k": 0}, "'k' must be an integer"),
+    ("recommend", {"q": "python", "s": "a"}, "Shards must be a list of shard names"),
+    ("recommend", {"q": "python", "s": ["zz"]}, "Unknown shard(s): zz"),
+    ("batch", {"qs": "python"}, "'qs' must be a list of non-empty strings"),
+    ("stream", {"qs": "python"}, "'qs' must be a list of non-empty strings"),
+    ("nope", {}, "Unknown method: nope"),
+])
+def test_bad_requests_get_error_frames(client, method, params, message):
+    with pytest.raises(rpc.RpcError, match=message.replace("(", r"\(").replace(")", r"\)")):
+        client._call(method, params)
+    # The connection stays usable after an error
+    assert client.recommend("python", top_n=1)["hits"]
+
+
+def test_not_ready_error(client, server):
+    _, state = server
+    state["engine"] = None
+
+    with pytest.raises(rpc.RpcError, match="not_ready"):
+        client.recommend("python")
+
+
+def read_frame(sock_file):
+    (size,) = struct.unpack(">I", sock_file.read(4))
+    return msgpack.unpackb(sock_file.read(size), raw=False, strict_map_key=False)
+
+
+def test_malformed_frame_gets_error_and_connection_survives(server):
+    port, _ = server
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        reader = sock.makefile("rb")
+        sock.sendall(struct.pack(">I", 3) + b"\xc1\xc1\xc1")
+        error = read_frame(reader)
+        assert error["id"] is None
+        assert error["e"].startswith("Malformed frame")
+
+        sock.sendall(rpc._frame({"id": 7, "m": "recommend", "p": {"q": "python", "k": 1}}))
+        assert read_frame(reader)["id"] == 7
+
+        sock.sendall(rpc._frame([1, 2, 3]))
+        assert read_frame(reader)["e"] == "Request must be a map"
@@ -0,0 +1,56 @@
+from text_extraction import extract_text, extract_text_from_chunks
+
+
+def test_keeps_job_title_in_header():
+    html = (b"<header><h1>Senior Python Developer</h1></header>"
+            b"<main><p>We need a dev</p><ul><li>Python</li><li>Django</li></ul></main>")
+
+    assert extract_text(html) == "Senior Python Developer We need a dev Python Django"
+
+
+def test_skips_boilerplate_and_repeated_list_text():
+    html = (b"<body><nav><li>Home</li></nav><p>Hello <b>world</b><button>Apply</button></p>"
+            b"<ul><li>a</li><li><p>b</p></li></ul><script>var x;</script><footer><p>(c)</p></footer></body>")
+
+    assert extract_text(html) == "Hello world a b"
+
+
+def test_list_item_wrapping_a_heading_is_not_repeated():
+    assert extract_text(b"<ul><li><h2>Title</h2></li><li>item</li></ul>") == "Title item"
+
+
+def test_decodes_utf8_without_meta_charset():
+    assert extract_text("<p>Développeur — München</p>".encode()) == "Développeur — München"
+
+
+def test_honours_declared_charset():
+    page = '<html><head><meta charset="windows-1252"></head><body><p>Café</p></body></html>'
+
+    assert extract_text(page.encode("cp1252")) == "Café"
+    assert extract_text("<p>Café</p>".encode("cp1252"), encoding="windows-1252") == "Café"
+
+
+def test_falls_back_to_bare_text():
+    assert extract_text(b"<div>only div text<script>x=1</script></div>") == "only div text"
+    assert extract_text(b"") == ""
+
+
+def test_stops_reading_once_enough_text_is_collected():
+    fed = []
+
+    def chunks():
+        yield b"<body><p>" + b"word " * 100 + b"</p>"
+        for i in range(1000):
+            fed.append(i)
+            yield b"<p>more text</p>"
+
+    text = extract_text_from_chunks(chunks(), max_chars=200)
+
+    assert len(text) == 200
+    assert len(fed) <= 1
+
+
+def test_caps_parsed_elements():
+    html = b"<body>" + b"<div><span>x</span></div>" * 1000 + b"<p>late paragraph</p></body>"
+
+    assert "late paragraph" not in extract_text(html, max_nodes=100)
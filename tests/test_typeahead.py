@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import typeahead
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("python dev", ("python dev", 5, None)),
+    ("123", ("123", 5, None)),
+    ('{"q": "java", "top_n": 3, "shards": ["shl"]}', ("java", 3, ["shl"])),
+    ('{"q": "java", "top_n": 100000}', ("java", typeahead.MAX_TOP_N, None)),
+    ('{"q": "java", "top_n": -4}', ("java", 1, None)),
+])
+def test_parse_update(message, expected):
+    assert typeahead.parse_update(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    '{"q": 5}',
+    '{"q": "java", "top_n": "lots"}',
+    '{"q": "java", "shards": "shl"}',
+    '{"q": "java", "shards": [1]}',
+])
+def test_parse_update_rejects_invalid_fields(message):
+    with pytest.raises(ValueError):
+        typeahead.parse_update(message)
+
+
+class Recorder:
+    """Fake encoder and ranker; encode blocks while the gate is closed."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.encoded = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self.sent = []
+
+    def _enter(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def _exit(self):
+        with self._lock:
+            self.active -= 1
+
+    def encode(self, text):
+        self._enter()
+        self.encoded.append(text)
+        self.gate.wait(timeout=5)
+        self._exit()
+        return len(text)
+
+    def rank(self, embedding, top_n, shards):
+        self._enter()
+        self._exit()
+        if shards == ["bad"]:
+            raise ValueError("Unknown shard(s): bad")
+        return [{"embedding": embedding, "top_n": top_n}]
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+async def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the session"
+        await asyncio.sleep(0.001)
+
+
+@pytest.fixture(autouse=True)
+def no_debounce(monkeypatch):
+    monkeypatch.setattr(typeahead, "DEBOUNCE_SECONDS", 0)
+
+
+def test_waits_for_the_debounce_pause(monkeypatch):
+    monkeypatch.setattr(typeahead, "DEBOUNCE_SECONDS", 60)
+    recorder = Recorder()
+
+    async def run():
+        session = typeahead.TypeaheadSession(recorder.encode, recorder.rank, recorder.send)
+        session.update("python")
+        for _ in range(10):
+            await asyncio.sleep(0)
+        session.close()
+
+    asyncio.run(run())
+
+    assert recorder.encoded == []
+    assert recorder.sent == []
+
+
+def test_debounces_to_latest_text():
+    recorder = Recorder()
+
+    async def run():
+        session = typeahead.TypeaheadSession(recorder.encode, recorder.rank, recorder.send)
+        # Each update supersedes the previous one before its debounce ends
+        for prefix in ["pyt", "pyth", "pytho", "python"]:
+            session.update(prefix)
+        await wait_until(lambda: recorder.sent)
+        session.close()
+
+    asyncio.run(run())
+
+    assert recorder.encoded == ["python"]
+    assert [m["query"] for m in recorder.sent] == ["python"]
+
+
+def test_caps_in_flight_work_and_reuses_cached_embeddings():
+    recorder = Recorder()
+
+    async def run():
+        session = typeahead.TypeaheadSession(recorder.encode, recorder.rank, recorder.send)
+        session.update("python")
+        await wait_until(lambda: len(recorder.sent) == 1)
+
+        recorder.gate.clear()
+        session.update("python dev")
+        await wait_until(lambda: "python dev" in recorder.encoded)
+        # Supersedes the running encode and is a cache hit, but its ranking
+        # call has to wait for the encode to free the connection's slot
+        session.update("python")
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert len(recorder.sent) == 1
+
+        recorder.gate.set()
+        await wait_until(lambda: len(recorder.sent) == 2)
+        session.close()
+
+    asyncio.run(run())
+
+    assert recorder.encoded == ["python", "python dev"]
+    assert recorder.peak == 1
+    assert [m["query"] for m in recorder.sent] == ["python", "python"]
+
+
+def test_reports_errors_and_short_queries():
+    recorder = Recorder()
+
+    async def run():
+        session = typeahead.TypeaheadSession(recorder.encode, recorder.rank, recorder.send)
+        session.update("python", shards=["bad"])
+        await wait_until(lambda: len(recorder.sent) == 1)
+        session.update("py")
+        await wait_until(lambda: len(recorder.sent) == 2)
+        session.close()
+
+    asyncio.run(run())
+
+    assert recorder.sent[0]["error"] == "Unknown shard(s): bad"
+    assert recorder.sent[1]["recommendations"] == []
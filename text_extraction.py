@@ -0,0 +1,194 @@
+"""
+HTML-to-text extraction shared by api.py, app.py and main.py.
+Feeds the page to lxml's incremental C parser chunk by chunk and stops
+downloading and parsing as soon as enough text has been collected for the
+encoder's token budget, or once the byte or element caps are reached.
+Boilerplate (scripts, navigation, footers, forms) is skipped.
+"""
+
+import re
+from typing import Iterable, Iterator, Optional
+
+from lxml import etree
+
+# all-MiniLM-L6-v2 truncates inputs at 256 word pieces. English averages
+# well under 8 characters per word piece, so 2048 characters always fills
+# the budget and anything beyond it would be cut by the encoder anyway.
+ENCODER_MAX_TOKENS = 256
+CHARS_PER_TOKEN = 8
+MAX_TEXT_CHARS = ENCODER_MAX_TOKENS * CHARS_PER_TOKEN
+
+MAX_HTML_BYTES = 2 * 1024 * 1024
+MAX_NODES = 5000
+CHUNK_BYTES = 16 * 1024
+FETCH_TIMEOUT = 5
+
+# <header> is deliberately not here: job pages often put the job title in it
+BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "svg", "iframe",
+    "nav", "footer", "aside", "form", "button", "select",
+)
+TEXT_TAGS = ("h1", "h2", "h3", "p", "li")
+
+_WHITESPACE = re.compile(r"\s+")
+_META_CHARSET = re.compile(rb"<meta[^>]*charset", re.IGNORECASE)
+_BOMS = (b"\xef\xbb\xbf", b"\xff\xfe", b"\xfe\xff")
+
+
+def _normalise(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _default_encoding(head: bytes) -> Optional[str]:
+    # A page that declares its charset (or starts with a BOM) is left to
+    # libxml2's own detection; otherwise assume UTF-8, not libxml2's Latin-1
+    if head.startswith(_BOMS) or _META_CHARSET.search(head):
+        return None
+    return "utf-8"
+
+
+class HtmlStream:
+    """The page at url in chunks, at most max_bytes in total.
+
+    encoding is the charset from the Content-Type header, or None if the
+    server did not send one. Closing the stream closes the connection and
+    stops the download.
+    """
+
+    def __init__(self, url: str, timeout: float = FETCH_TIMEOUT, max_bytes: int = MAX_HTML_BYTES):
+        # Only needed for URL inputs, not for extracting already-saved pages
+        import requests
+
+        self.max_bytes = max_bytes
+        self._res = requests.get(url, timeout=timeout, stream=True)
+        try:
+            self._res.raise_for_status()
+        except Exception:
+            self._res.close()
+            raise
+        # requests reports ISO-8859-1 for any text/* response without a
+        # charset, so only trust an explicit one
+        content_type = self._res.headers.get("Content-Type", "").lower()
+        self.encoding = self._res.encoding if "charset=" in content_type else None
+
+    def __iter__(self) -> Iterator[bytes]:
+        size = 0
+        for chunk in self._res.iter_content(chunk_size=CHUNK_BYTES):
+            yield chunk[:self.max_bytes - size]
+            size += len(chunk)
+            if size >= self.max_bytes:
+                return
+
+    def close(self):
+        self._res.close()
+
+
+def extract_text_from_chunks(
+    chunks: Iterable[bytes],
+    max_chars: int = MAX_TEXT_CHARS,
+    max_nodes: int = MAX_NODES,
+    max_bytes: int = MAX_HTML_BYTES,
+    encoding: Optional[str] = None,
+) -> str:
+    """Return the main body text of an HTML document fed as chunks, at most max_chars long.
+
+    encoding is the transport charset (e.g. from Content-Type). Without one,
+    a charset declared in the page is used, and UTF-8 otherwise.
+    """
+    parser = None
+    parts = []
+    total = 0
+    nodes = 0
+    skip_depth = 0
+    fed = 0
+    done = False
+
+    try:
+        for chunk in chunks:
+            chunk = chunk[:max_bytes - fed]
+            if not chunk:
+                if fed >= max_bytes:
+                    break
+                continue
+            if parser is None:
+                # A parser per call: lxml serialises all use of one parser instance
+                parser = etree.HTMLPullParser(
+                    events=("start", "end"), remove_comments=True, remove_pis=True, no_network=True,
+                    encoding=encoding or _default_encoding(chunk),
+                )
+            fed += len(chunk)
+            parser.feed(chunk)
+
+            for event, el in parser.read_events():
+                tag = el.tag
+                if event == "start":
+                    nodes += 1
+                    if tag in BOILERPLATE_TAGS:
+                        skip_depth += 1
+                    if nodes >= max_nodes:
+                        done = True
+                        break
+                    continue
+
+                if tag in BOILERPLATE_TAGS:
+                    skip_depth -= 1
+                    continue
+                if skip_depth or tag not in TEXT_TAGS:
+                    continue
+                # A list item wrapping headings, paragraphs or a nested list would repeat their text
+                if tag == "li" and any(el.find(f".//{inner}") is not None for inner in TEXT_TAGS):
+                    continue
+                etree.strip_elements(el, *BOILERPLATE_TAGS, with_tail=False)
+                text = _normalise("".join(el.itertext()))
+                if text:
+                    parts.append(text)
+                    total += len(text) + 1
+                    if total >= max_chars:
+                        done = True
+                        break
+
+            if done or fed >= max_bytes:
+                break
+        root = parser.close() if parser is not None else None
+    except etree.XMLSyntaxError:
+        root = None
+
+    if parts:
+        return " ".join(parts)[:max_chars]
+    if root is None:
+        return ""
+
+    # Pages that lay text out in bare divs still yield something. The tree
+    # is already bounded by the byte and element caps above.
+    etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+    pieces = []
+    size = 0
+    for piece in root.itertext():
+        pieces.append(piece)
+        size += len(piece)
+        if size >= 2 * max_chars:
+            break
+    return _normalise("".join(pieces))[:max_chars]
+
+
+def extract_text(
+    html: bytes,
+    max_chars: int = MAX_TEXT_CHARS,
+    max_nodes: int = MAX_NODES,
+    max_bytes: int = MAX_HTML_BYTES,
+    encoding: Optional[str] = None,
+) -> str:
+    """Return the main body text of an HTML document, at most max_chars long."""
+    chunks = (html[i:i + CHUNK_BYTES] for i in range(0, min(len(html), max_bytes), CHUNK_BYTES))
+    return extract_text_from_chunks(
+        chunks, max_chars=max_chars, max_nodes=max_nodes, max_bytes=max_bytes, encoding=encoding,
+    )
+
+
+def extract_text_from_url(url: str, max_chars: int = MAX_TEXT_CHARS) -> str:
+    """Fetch url and extract its text; network and HTTP errors propagate."""
+    stream = HtmlStream(url)
+    try:
+        return extract_text_from_chunks(stream, max_chars=max_chars, encoding=stream.encoding)
+    finally:
+        stream.close()
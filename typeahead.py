@@ -0,0 +1,132 @@
+"""
+As-you-type recommendations for the SHL Assessment Recommender API.
+A TypeaheadSession holds the state of one WebSocket connection. Each text
+update is debounced server-side and supersedes any earlier one. A
+superseded computation is cancelled if it has not started, and its result
+is discarded if it has. Each connection may run at most
+MAX_IN_FLIGHT_PER_CONNECTION encoder/ranking calls at once, so one fast
+typist cannot monopolise the encoder.
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEBOUNCE_SECONDS = float(os.environ.get("SHL_TYPEAHEAD_DEBOUNCE_MS", "150")) / 1000
+MAX_IN_FLIGHT_PER_CONNECTION = int(os.environ.get("SHL_TYPEAHEAD_MAX_IN_FLIGHT", "1"))
+EMBEDDING_CACHE_SIZE = 128
+MIN_QUERY_CHARS = 3
+DEFAULT_TOP_N = 5
+MAX_TOP_N = 20
+
+_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="typeahead")
+
+
+def parse_update(message: str):
+    """Return (text, top_n, shards) for one client message.
+
+    A message is either a JSON object {"q": ..., "top_n": ..., "shards": [...]}
+    or the bare query text. top_n is clamped to 1-MAX_TOP_N; invalid fields
+    raise ValueError.
+    """
+    try:
+        params = json.loads(message)
+    except ValueError:
+        params = None
+    if not isinstance(params, dict):
+        return message, DEFAULT_TOP_N, None
+
+    text = params.get("q", "")
+    if not isinstance(text, str):
+        raise ValueError("'q' must be a string")
+    top_n = params.get("top_n", DEFAULT_TOP_N)
+    if isinstance(top_n, bool) or not isinstance(top_n, int):
+        raise ValueError("'top_n' must be an integer")
+    shards = params.get("shards")
+    if shards is not None and (not isinstance(shards, list) or not all(isinstance(s, str) for s in shards)):
+        raise ValueError("'shards' must be a list of shard names")
+    return text, min(max(top_n, 1), MAX_TOP_N), shards
+
+
+class TypeaheadSession:
+    """Debounced, cancellable recommendations for one connection.
+
+    encode(text) returns a query embedding, rank(embedding, top_n, shards)
+    returns the JSON-ready recommendations and send(message) is the
+    coroutine that delivers a message to the client.
+    """
+
+    def __init__(self, encode, rank, send):
+        self.encode = encode
+        self.rank = rank
+        self.send = send
+        self._cache = OrderedDict()
+        self._slots = asyncio.Semaphore(MAX_IN_FLIGHT_PER_CONNECTION)
+        self._pending = None
+        self._seq = 0
+
+    def update(self, text: str, top_n: int = 5, shards=None):
+        """Schedule recommendations for text, superseding earlier updates."""
+        self._seq += 1
+        if self._pending is not None:
+            self._pending.cancel()
+        self._pending = asyncio.ensure_future(self._run(self._seq, text, top_n, shards))
+
+    def close(self):
+        if self._pending is not None:
+            self._pending.cancel()
+
+    async def _run(self, seq: int, text: str, top_n: int, shards):
+        await asyncio.sleep(DEBOUNCE_SECONDS)
+        text = text.strip()
+        try:
+            if len(text) < MIN_QUERY_CHARS:
+                recommendations = []
+            else:
+                embedding = await self._embed(text)
+                recommendations = await self._call(self.rank, embedding, top_n, shards)
+            message = {"seq": seq, "query": text, "recommendations": recommendations}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            message = {"seq": seq, "query": text, "error": str(e)}
+
+        if seq != self._seq:
+            return
+        try:
+            await self.send(message)
+        except Exception:
+            # The client disconnected; the receive loop will clean up
+            pass
+
+    async def _embed(self, text: str):
+        embedding = self._cache.get(text)
+        if embedding is not None:
+            self._cache.move_to_end(text)
+            return embedding
+        # Cache the embedding even if this update is superseded before the
+        # encode finishes, since backspacing often returns to the same text
+        return await self._call(self.encode, text, on_result=lambda result: self._remember(text, result))
+
+    def _remember(self, text: str, embedding):
+        self._cache[text] = embedding
+        self._cache.move_to_end(text)
+        while len(self._cache) > EMBEDDING_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    async def _call(self, fn, *args, on_result=None):
+        # The slot is held until the worker thread finishes, not just until
+        # this task is cancelled, so the cap bounds real encoder usage
+        await self._slots.acquire()
+        loop = asyncio.get_event_loop()
+        future = _executor.submit(fn, *args)
+
+        def finished(done):
+            self._slots.release()
+            if on_result is not None and not done.cancelled() and done.exception() is None:
+                on_result(done.result())
+
+        future.add_done_callback(lambda done: loop.call_soon_threadsafe(finished, done))
+        return await asyncio.wrap_future(future)